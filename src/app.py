@@ -30,8 +30,48 @@ TOOL_CONFIG: Dict[str, ToolConfig] = {
 }
 
 
+_DEFAULT_CATEGORY = "Other tools"
+
+# Page styling, emitted on every run since Streamlit drops elements a rerun doesn't re-create
+_CSS = """
+.main {
+    max-width: 900px;
+    padding: 1rem;
+    margin: 0 auto;
+}
+/* Streamlit page link styling */
+.stPageLink {
+    width: 100% !important;
+    white-space: normal !important;
+    height: auto !important;
+    min-height: 46px;
+    padding: 0.5rem 1rem !important;
+    margin-bottom: 0.5rem;
+    word-break: break-word;
+    text-align: left !important;
+}
+.stPageLink > div {
+    white-space: normal !important;
+    text-align: left !important;
+}
+@media (max-width: 768px) {
+    .main {
+        padding: 0.5rem;
+    }
+    .stPageLink {
+        font-size: 0.9rem;
+        padding: 0.75rem !important;
+    }
+}
+"""
+
+
+@st.cache_resource(show_spinner=False)
 def load_tools():
-    """Load tool configurations from the pages directory."""
+    """Load tool configurations from the pages directory.
+
+    Cached for the lifetime of the process; call `load_tools.clear()` to rescan.
+    """
     # Get the absolute path to the pages directory
     current_dir = os.path.dirname(os.path.abspath(__file__))
     pages_dir = os.path.join(current_dir, "pages")
@@ -41,64 +81,32 @@ def load_tools():
         st.error(f"Pages directory not found at: {pages_dir}")
         return tools_by_category
 
-    for filename in os.listdir(pages_dir):
-        if filename.endswith(".py"):
+    with os.scandir(pages_dir) as entries:
+        for entry in entries:
+            if not (entry.name.endswith(".py") and entry.is_file()):
+                continue
             tool_config = TOOL_CONFIG.get(
-                filename,
+                entry.name,
                 {
-                    "name": os.path.splitext(filename)[0].replace("_", " ").title(),
+                    "name": os.path.splitext(entry.name)[0].replace("_", " ").title(),
                     "description": "",
-                    "category": "Other tools",
+                    "category": _DEFAULT_CATEGORY,
                 },
             )
             category = tool_config["category"]
-            if category not in tools_by_category:
-                tools_by_category[category] = []
-            tools_by_category[category].append((filename, tool_config))
+            tools_by_category.setdefault(category, []).append((entry.name, tool_config))
 
     return tools_by_category
 
 
+def _inject_css():
+    st.markdown(f"<style>{_CSS}</style>", unsafe_allow_html=True)
+
+
 def main():
     st.set_page_config(page_title="Tools", initial_sidebar_state="collapsed")
 
-    # Add custom CSS
-    st.markdown(
-        """
-        <style>
-        .main {
-            max-width: 900px;
-            padding: 1rem;
-            margin: 0 auto;
-        }
-        /* Streamlit page link styling */
-        .stPageLink {
-            width: 100% !important;
-            white-space: normal !important;
-            height: auto !important;
-            min-height: 46px;
-            padding: 0.5rem 1rem !important;
-            margin-bottom: 0.5rem;
-            word-break: break-word;
-            text-align: left !important;
-        }
-        .stPageLink > div {
-            white-space: normal !important;
-            text-align: left !important;
-        }
-        @media (max-width: 768px) {
-            .main {
-                padding: 0.5rem;
-            }
-            .stPageLink {
-                font-size: 0.9rem;
-                padding: 0.75rem !important;
-            }
-        }
-        </style>
-    """,
-        unsafe_allow_html=True,
-    )
+    _inject_css()
 
     tools_by_category = load_tools()
 
@@ -1,78 +1,440 @@
 import streamlit as st
 import bibtexparser
 import requests
+import json
 import time
 import re
-from typing import Dict, List, Optional
-import urllib.request
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote_plus
+from typing import Callable, Dict, FrozenSet, List, Optional
 from bibtexparser.bibdatabase import BibDatabase
 from bibtexparser.bparser import BibTexParser
+from requests.adapters import HTTPAdapter
+
+_TIMEOUT = (5, 30)
+# Wait used when DBLP answers 429 without a usable Retry-After header
+_DEFAULT_RETRY_AFTER = 30.0
+# Constant part of the search query; only the hit count and the title vary
+_DBLP_SEARCH_URL = "https://dblp.org/search/publ/api?format=json&h="
+_BRACE_TRANS = str.maketrans("", "", "{}")
+# Anything that is neither alphanumeric nor whitespace (\w also matches "_")
+_NON_ALNUM_RE = re.compile(r"[^\w\s]|_")
+# Same filter as a translate table for the common all-ASCII case, also mapping "-" to " "
+_ASCII_CLEAN_TRANS = str.maketrans(
+    {
+        chr(i): None
+        for i in range(128)
+        if not (chr(i).isalnum() or chr(i).isspace())
+    }
+    | {"-": " "}
+)
+# Persistent cache of DBLP responses, so repeat runs over the same titles skip the network
+_DISK_CACHE_PATH = os.environ.get("DBLP_CACHE_PATH", ".dblp_cache.sqlite3")
+_DISK_CACHE_TTL = 30 * 24 * 3600
+_DISK_CACHE_LOCK = threading.Lock()
+# Matches field=VALUE where VALUE is a bare alphanumeric macro
+_MACRO_RE = re.compile(r"([a-zA-Z]+)\s*=\s*([A-Za-z0-9]+(?!\{|\"))")
+# URL or scheme prefixes that do not distinguish one DOI from another
+_DOI_PREFIX_RE = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)")
+# Word-level Jaccard similarity above which a DBLP hit is accepted without asking
+_MATCH_THRESHOLD = 0.8
+# Upper bound on in-flight DBLP requests, keeping our load on dblp.org bounded
+_MAX_CONCURRENT_REQUESTS = 5
+# Global ceiling on requests per second to dblp.org: at most one every 2 seconds
+_MAX_REQUEST_RATE = 0.5
+# How often the prefetch loop refreshes its status while no search completes
+_PROGRESS_INTERVAL = 1.0
+
+
+@st.cache_resource(show_spinner=False)
+def get_session() -> requests.Session:
+    """Return the shared DBLP session, e.g. to mount an adapter with retries.
+
+    Cached as a resource so all dblp.org traffic reuses pooled keep-alive
+    connections across reruns, which re-execute this page from the top.
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=20))
+    session.headers.update(
+        {
+            "User-Agent": "tools-bibtex-dblp-resolver/0.1",
+            # requests decompresses transparently; DBLP serves compressed .bib and JSON
+            "Accept-Encoding": "gzip, deflate",
+        }
+    )
+    return session
+
+
+class AdaptiveBucket:
+    """Token bucket whose refill rate adapts to DBLP's congestion signals (AIMD).
+
+    Successful responses raise the rate additively, 429/5xx responses halve it.
+    Waiting callers sleep outside the lock and re-check the bucket when they wake,
+    so a pause that starts while they sleep still holds them back.
+    """
+
+    def __init__(
+        self,
+        rate: float = _MAX_REQUEST_RATE,
+        capacity: float = 1.0,
+        min_rate: float = 0.1,
+        max_rate: float = _MAX_REQUEST_RATE,
+        increase: float = 0.05,
+        growth_cap: float = 1.1,
+        backoff: float = 0.5,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.growth_cap = growth_cap
+        self.backoff = backoff
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.last_congestion = float("-inf")
+        self.next_allowed_ts = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        # Tokens only accrue from the end of a pause, not while it lasts
+        start = max(self.last_refill, self.next_allowed_ts)
+        if now > start:
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.next_allowed_ts and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                if now < self.next_allowed_ts:
+                    wait = self.next_allowed_ts - now
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold back every request for `seconds`, e.g. as asked by a Retry-After header."""
+        with self._lock:
+            self.next_allowed_ts = max(self.next_allowed_ts, time.monotonic() + seconds)
+            # Tokens saved up before the pause must not all be spent the moment it ends
+            self.tokens = min(self.tokens, 1)
+
+    def pause_remaining(self) -> float:
+        """Seconds left before paused requests may be sent again, 0 if not paused."""
+        return max(0.0, self.next_allowed_ts - time.monotonic())
+
+    def report(self, status_code: int):
+        """Adjust the rate based on the status code of a completed request."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if status_code == 429 or status_code >= 500:
+                # Requests already in flight report the same congestion; back off once per window
+                if now - self.last_congestion >= 1 / self.rate:
+                    self.rate = max(self.min_rate, self.rate * self.backoff)
+                    self.tokens = min(self.tokens, 0)
+                    self.last_congestion = now
+            elif status_code < 400:
+                self.rate = min(
+                    self.max_rate, self.rate + self.increase, self.rate * self.growth_cap
+                )
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # "-0000" yields a naive datetime; HTTP dates are always GMT
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _rate_limit_delay(response: requests.Response) -> Optional[float]:
+    """Seconds DBLP asks us to hold off before the next request, if any."""
+    retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+    if retry_after is not None:
+        return retry_after
+    if response.status_code == 429:
+        return _DEFAULT_RETRY_AFTER
+    # Slow down before the quota runs out instead of waiting for the 429
+    remaining = response.headers.get("X-RateLimit-Remaining", "")
+    if remaining.isdigit() and int(remaining) < 2:
+        return 1.0
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def _get_bucket() -> AdaptiveBucket:
+    """Rate limiter shared by every session and thread talking to dblp.org.
+
+    Starts at the global ceiling without a burst; congestion only lowers it from there.
+    """
+    return AdaptiveBucket()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_disk_cache() -> Optional[sqlite3.Connection]:
+    """Open the persistent DBLP response cache, or return None if it is unavailable."""
+    try:
+        conn = sqlite3.connect(_DISK_CACHE_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        return conn
+    except sqlite3.Error:
+        return None
+
 
+def _disk_cache_key(kind: str, value: str) -> str:
+    return f"{kind}:{hashlib.blake2b(value.encode(), digest_size=16).hexdigest()}"
+
+
+def _disk_cache_get(key: str) -> Optional[str]:
+    """Return the cached response for `key` unless it is missing or expired."""
+    conn = _get_disk_cache()
+    if conn is None:
+        return None
+    try:
+        with _DISK_CACHE_LOCK:
+            row = conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND created > ?",
+                (key, time.time() - _DISK_CACHE_TTL),
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _disk_cache_set(key: str, value: str):
+    conn = _get_disk_cache()
+    if conn is None:
+        return
+    try:
+        with _DISK_CACHE_LOCK:
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                (key, value, now),
+            )
+            # Expired rows are never read again; drop them so the file does not grow forever
+            conn.execute("DELETE FROM responses WHERE created <= ?", (now - _DISK_CACHE_TTL,))
+    except sqlite3.Error:
+        pass
+
+
+def clear_dblp_cache():
+    """Drop all cached DBLP responses, both in memory and on disk."""
+    _query_dblp.clear()
+    _fetch_dblp_bib.clear()
+    conn = _get_disk_cache()
+    if conn is None:
+        return
+    try:
+        with _DISK_CACHE_LOCK:
+            conn.execute("DELETE FROM responses")
+    except sqlite3.Error:
+        pass
 
+
+@functools.lru_cache(maxsize=16384)
 def clean_title(title: str) -> str:
     """Clean title for search by removing special characters and common words."""
-    clean = title.replace("{", "").replace("}", "").replace("--", " ").replace("-", " ")
-    clean = "".join(c for c in clean if c.isalnum() or c.isspace())
+    clean = title.translate(_BRACE_TRANS).replace("--", " ")
+    if clean.isascii():
+        clean = clean.translate(_ASCII_CLEAN_TRANS)
+    else:
+        clean = _NON_ALNUM_RE.sub("", clean.replace("-", " "))
     clean = clean.lower()
     return clean
 
 
-def search_dblp(title: str, num_results: int = 5, max_retries: int = 5) -> List[Dict]:
-    """Search DBLP and return results."""
-    clean_search_title = clean_title(title)
-    url = "https://dblp.org/search/publ/api"
-    params = {
-        "q": clean_search_title,
-        "format": "json",
-        "h": num_results,
-    }
+@functools.lru_cache(maxsize=16384)
+def title_tokens(title: str) -> FrozenSet[str]:
+    """Return the set of words in the cleaned title, used for similarity scoring."""
+    return frozenset(clean_title(title).split())
+
+
+@st.cache_data(ttl=3600, max_entries=2048, show_spinner=False)
+def _query_dblp(clean_search_title: str, num_results: int = 5, max_retries: int = 5) -> List[Dict]:
+    """Query the DBLP search API without touching the UI, so it can run in worker threads.
+
+    Results are cached across reruns and sessions, and on disk for 30 days, so
+    repeated titles cost no request.
+    Rate limits are honored by pausing the shared bucket for ``Retry-After``.
+    Raises ``requests.exceptions.RequestException`` once all retries are used up.
+    """
+    cache_key = _disk_cache_key("search", f"{num_results}:{clean_search_title}")
+    cached = _disk_cache_get(cache_key)
+    if cached is not None:
+        return json.loads(cached)
+
+    url = f"{_DBLP_SEARCH_URL}{num_results}&q={quote_plus(clean_search_title)}"
 
-    retry_count = 0
-    while retry_count < max_retries:
+    for attempt in range(max_retries):
         try:
-            response = requests.get(url, params=params)
+            bucket = _get_bucket()
+            bucket.acquire()
+            response = get_session().get(url, timeout=_TIMEOUT)
+            bucket.report(response.status_code)
+            delay = _rate_limit_delay(response)
+            if delay:
+                # The next acquire() in any thread waits this out
+                bucket.pause(delay)
             if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 30))
-                st.warning(f"Rate limited by DBLP. Waiting {retry_after} seconds...")
-                time.sleep(retry_after)
-                retry_count += 1
                 continue
 
             response.raise_for_status()
-            data = response.json()
+            # json decodes UTF-8 bytes directly, skipping requests' charset detection
+            try:
+                data = json.loads(response.content)
+            except ValueError as e:
+                # e.g. a maintenance page served with 200; retry like any failed request
+                raise requests.exceptions.InvalidJSONError(str(e), response=response) from e
             hits = data.get("result", {}).get("hits", {}).get("hit", [])
             results = [hit.get("info", {}) for hit in hits]
-            with st.spinner("Waiting 2 seconds before next request..."):
-                time.sleep(2)
+            _disk_cache_set(cache_key, json.dumps(results))
             return results
-        except requests.exceptions.RequestException as e:
-            if retry_count < max_retries - 1:
-                st.error(f"Error accessing DBLP: {e}. Retrying...")
-                retry_count += 1
-            else:
-                st.error(f"Failed to access DBLP after {max_retries} attempts: {e}")
-                return []
+        except requests.exceptions.RequestException:
+            if attempt == max_retries - 1:
+                raise
+    raise requests.exceptions.RetryError(f"Still rate limited by DBLP after {max_retries} attempts")
+
+
+def _dblp_spinner(text: str):
+    """Spinner for a DBLP call on the script thread that names a pending rate-limit wait."""
+    wait_seconds = _get_bucket().pause_remaining()
+    if wait_seconds > 0:
+        text = f"Rate limited by DBLP. Waiting {wait_seconds:.0f} seconds..."
+    return st.spinner(text)
+
+
+def search_dblp(title: str, num_results: int = 5, max_retries: int = 5) -> List[Dict]:
+    """Search DBLP and return results."""
+    try:
+        results = _query_dblp(clean_title(title), num_results, max_retries)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Failed to access DBLP after {max_retries} attempts: {e}")
+        return []
+    return results
+
+
+def prefetch_all(
+    titles: List[str], on_progress: Optional[Callable[[int, int, float], None]] = None
+) -> Dict[str, List[Dict]]:
+    """Search DBLP for all titles concurrently and return the results keyed by cleaned title.
+
+    Titles that clean to the same string share a single query. As soon as a search
+    yields a match that will be auto-accepted, its .bib is fetched on the same pool
+    so `merge_entries` finds it cached. Titles whose lookup failed are left out, so
+    callers can fall back to `search_dblp`; failed .bib prefetches are retried there.
+    `on_progress(done, total, rate_limit_wait)` is called from the calling thread after
+    each search and periodically in between, with the seconds left on a DBLP rate-limit
+    pause (0 if there is none).
+    """
+    # First original title per cleaned title, used to decide on auto-accepts
+    unique_titles = {}
+    for title in titles:
+        unique_titles.setdefault(clean_title(title), title)
+    results: Dict[str, List[Dict]] = {}
+    executor = ThreadPoolExecutor(max_workers=_MAX_CONCURRENT_REQUESTS)
+    try:
+        futures = {
+            executor.submit(_query_dblp, clean_search_title): clean_search_title
+            for clean_search_title in unique_titles
+        }
+        pending = set(futures)
+        while pending:
+            # Wake up periodically so a Retry-After pause is reported while nothing completes
+            finished, pending = wait(pending, timeout=_PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in finished:
+                clean_search_title = futures[future]
+                try:
+                    results[clean_search_title] = future.result()
+                except requests.exceptions.RequestException:
+                    continue
+                exact_match = find_exact_match(
+                    unique_titles[clean_search_title], results[clean_search_title]
+                )
+                bib_url = _bib_url(exact_match.get("url", "")) if exact_match else None
+                if bib_url:
+                    executor.submit(_fetch_dblp_bib, bib_url)
+            if on_progress:
+                on_progress(len(futures) - len(pending), len(futures), _get_bucket().pause_remaining())
+        # Let the .bib prefetches submitted above finish, so merge_entries finds them cached
+        executor.shutdown(wait=True)
+    finally:
+        # A rerun or stop raises out of on_progress; drop the queued work instead of waiting on it
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def find_exact_match(title: str, dblp_results: List[Dict]) -> Optional[Dict]:
+    """Return the first DBLP result whose title matches, preferring non-preprint venues."""
+    original_tokens = title_tokens(title)
+    preprint_match = None
+
+    for result in dblp_results:
+        venue = result.get("venue", "")
+        is_preprint = "CoRR" in venue or "arXiv" in venue
+        # An earlier preprint match can only be beaten by a non-preprint one
+        if is_preprint and preprint_match is not None:
+            continue
+
+        result_tokens = title_tokens(result.get("title", ""))
+        # Jaccard similarity is at most min/max of the set sizes, so skip hopeless pairs
+        shorter, longer = sorted((len(original_tokens), len(result_tokens)))
+        if shorter <= _MATCH_THRESHOLD * longer:
+            continue
+
+        total_words = original_tokens | result_tokens
+        overlap = original_tokens & result_tokens
+        similarity = len(overlap) / len(total_words)
+
+        if similarity > _MATCH_THRESHOLD:
+            if not is_preprint:
+                return result
+            preprint_match = result
+
+    return preprint_match
 
 
 def get_author_str(authors) -> str:
     """Extract author string from DBLP author field."""
     if not authors:
         return "N/A"
-    if isinstance(authors, str):
-        return authors
-    if isinstance(authors, dict):
-        author_list = authors.get("author", [])
-    else:
-        author_list = authors
-    if isinstance(author_list, str):
-        return author_list
-    elif isinstance(author_list, list):
-        author_names = [
-            author.get("text", "N/A") if isinstance(author, dict) else str(author)
-            for author in author_list
-        ]
-        return "; ".join(filter(None, author_names))
-    return "N/A"
+    author_list = authors.get("author", []) if isinstance(authors, dict) else authors
+    # DBLP returns a bare object instead of a list when there is a single author
+    if isinstance(author_list, (str, dict)):
+        author_list = [author_list]
+    if not isinstance(author_list, list):
+        return "N/A"
+    author_names = [
+        author.get("text", "N/A") if isinstance(author, dict) else str(author)
+        for author in author_list
+    ]
+    return "; ".join(filter(None, author_names)) or "N/A"
 
 
 def format_entry_for_display(entry: Dict, is_dblp: bool = False) -> str:
@@ -101,35 +463,76 @@ def format_entry_for_display(entry: Dict, is_dblp: bool = False) -> str:
 🏷️ Citation Key: {entry.get("ID", "N/A")}"""
 
 
+@st.cache_data(ttl=86400, max_entries=4096, show_spinner=False)
+def _fetch_dblp_bib(bib_url: str) -> str:
+    """Download the raw .bib text at `bib_url`, or "" if DBLP has no such record.
+
+    Raises on other HTTP errors so transient failures are not cached.
+    """
+    cache_key = _disk_cache_key("bib", bib_url)
+    cached = _disk_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    bucket = _get_bucket()
+    bucket.acquire()
+    response = get_session().get(bib_url, timeout=_TIMEOUT)
+    bucket.report(response.status_code)
+    delay = _rate_limit_delay(response)
+    if delay:
+        bucket.pause(delay)
+    if response.status_code == 404:
+        return ""
+    response.raise_for_status()
+    _disk_cache_set(cache_key, response.text)
+    return response.text
+
+
+def _bib_url(dblp_url: str) -> Optional[str]:
+    """Map a DBLP record URL to the URL of its .bib export, or None if it is not a record URL."""
+    if "/rec/bibtex/" in dblp_url:
+        return dblp_url
+    if "/rec/" not in dblp_url:
+        return None
+    return dblp_url.replace("/rec/", "/rec/bibtex/", 1)
+
+
 def get_bib_from_dblp_url(dblp_url: str) -> Optional[str]:
     """Fetches the .bib entry from DBLP using the DBLP URL."""
+    bib_url = _bib_url(dblp_url)
+    if bib_url is None:
+        st.warning(f"Could not retrieve .bib for {dblp_url}")
+        return None
     try:
-        bib_url = dblp_url.replace("/rec/", "/rec/bibtex/")
-        with urllib.request.urlopen(bib_url) as response:
-            bib_entry = response.read().decode()
-            if "not found" not in bib_entry.lower():
-                return bib_entry
-            else:
-                st.warning(f"Could not retrieve .bib for {dblp_url}")
-                return None
+        with _dblp_spinner("Fetching .bib from DBLP..."):
+            bib_entry = _fetch_dblp_bib(bib_url)
+        if bib_entry and "not found" not in bib_entry.lower():
+            return bib_entry
+        else:
+            st.warning(f"Could not retrieve .bib for {dblp_url}")
+            return None
     except Exception as e:
         st.error(f"Error fetching .bib from {bib_url}: {e}")
         return None
 
 
+@st.cache_data(max_entries=4096, show_spinner=False)
+def parse_dblp_bib(bib_entry_str: str) -> List[Dict]:
+    """Parse a .bib record fetched from DBLP; each call returns a fresh copy."""
+    bib_parser = BibTexParser(common_strings=True)
+    return bibtexparser.loads(bib_entry_str, parser=bib_parser).entries
+
+
 def merge_entries(bibtex_entry: Dict, dblp_entry: Dict) -> Dict:
     """Merge DBLP entry into BibTeX entry, using fetched bib if available."""
-    merged = bibtex_entry.copy()
-
     # Fetch .bib from DBLP URL
     dblp_url = dblp_entry.get("url")
     if dblp_url:
         bib_entry_str = get_bib_from_dblp_url(dblp_url)
         if bib_entry_str:
-            bib_parser = bibtexparser.bparser.BibTexParser(common_strings=True)
-            bib_database = bibtexparser.loads(bib_entry_str, parser=bib_parser)
-            if bib_database.entries:
-                fetched_bib_entry = bib_database.entries[0]
+            fetched_entries = parse_dblp_bib(bib_entry_str)
+            if fetched_entries:
+                fetched_bib_entry = fetched_entries[0]
 
                 # Use the fetched entry but keep the original ID
                 merged = fetched_bib_entry
@@ -137,6 +540,7 @@ def merge_entries(bibtex_entry: Dict, dblp_entry: Dict) -> Dict:
                 return merged
 
     # Fallback to merging fields if direct .bib fetching fails
+    merged = bibtex_entry.copy()
     field_mapping = {
         "title": "title",
         "year": "year",
@@ -156,20 +560,33 @@ def merge_entries(bibtex_entry: Dict, dblp_entry: Dict) -> Dict:
     return merged
 
 
-def handle_accept(entry, dblp_entry):
+def handle_accept(entry, dblp_entry, duplicates=()):
     merged_entry = merge_entries(entry, dblp_entry)
     st.session_state.processed_entries.append(merged_entry)
-    st.session_state.current_entry += 1
+    for duplicate in duplicates:
+        st.session_state.processed_entries.append(merge_entries(duplicate, dblp_entry))
+    st.session_state.current_conflict += 1
 
 
-def handle_decline(entry, dblp_entry=None):
+def handle_decline(entry, dblp_entry=None, duplicates=()):
     st.session_state.processed_entries.append(entry)
-    st.session_state.current_entry += 1
+    st.session_state.processed_entries.extend(duplicates)
+    st.session_state.current_conflict += 1
+
 
+def duplicate_key(entry: Dict) -> Optional[str]:
+    """Key shared by entries describing the same paper: the DOI, else the cleaned title."""
+    doi = _DOI_PREFIX_RE.sub("", entry.get("doi", "").strip().lower())
+    if doi:
+        return f"doi:{doi}"
+    title = clean_title(entry.get("title", "")).strip()
+    return f"title:{title}" if title else None
 
-def add_todo_note(entry: Dict) -> Dict:
-    """Add a TODO note to the entry."""
-    entry = entry.copy()
+
+def add_todo_note(entry: Dict, copy: bool = True) -> Dict:
+    """Add a TODO note to the entry, in place if `copy` is False."""
+    if copy:
+        entry = entry.copy()
     note = "TODO: Search for this entry manually in DBLP"
     if "note" in entry:
         entry["note"] = f"{entry['note']}. {note}"
@@ -178,6 +595,39 @@ def add_todo_note(entry: Dict) -> Dict:
     return entry
 
 
+@st.fragment
+def review_conflict(conflict: Dict):
+    """Show a conflict and its DBLP matches.
+
+    Interactions inside the fragment only rerun this block; choosing an answer
+    reruns the whole page to advance to the next conflict.
+    """
+    original = conflict["original"]
+    matches = conflict["matches"]
+    duplicates = conflict["duplicates"]
+
+    st.subheader("Original Entry")
+    st.text(conflict["formatted_original"])
+    if duplicates:
+        keys = ", ".join(duplicate.get("ID", "N/A") for duplicate in duplicates)
+        st.caption(f"Your answer also applies to duplicate entries: {keys}")
+
+    st.subheader("DBLP Matches")
+    for idx, (match, formatted_match) in enumerate(zip(matches, conflict["formatted_matches"])):
+        col1, col2 = st.columns([0.1, 0.9])
+        with col1:
+            if st.button(f"{idx+1}", key=f"match_{idx}"):
+                handle_accept(original, match, duplicates)
+                st.rerun(scope="app")
+        with col2:
+            st.text(formatted_match)
+
+    if st.button("Skip", key="skip"):
+        # Keep the original entry and move on to the next conflict
+        handle_decline(original, duplicates=duplicates)
+        st.rerun(scope="app")
+
+
 # ----------------------
 # MAIN PAGE CONTENT
 # ----------------------
@@ -190,15 +640,27 @@ def clean_bibtex(bib_to_format: str) -> BibDatabase:
         field, value = match.groups()
         return f"{field}={{{value}}}"
 
-    # Pattern matches field=VALUE where VALUE is alphanumeric
-    pattern = r"([a-zA-Z]+)\s*=\s*([A-Za-z0-9]+(?!\{|\"))"
-    bibtex_str = re.sub(pattern, replace_macro, bib_to_format)
+    bibtex_str = _MACRO_RE.sub(replace_macro, bib_to_format)
     parser = BibTexParser()
     bib_database = bibtexparser.loads(bibtex_str, parser)
     return bib_database
 
 
+@st.cache_data(ttl=3600, max_entries=32, show_spinner="Parsing BibTeX file...")
+def parse_bib(content: bytes) -> List[Dict]:
+    """Parse an uploaded BibTeX file into its entries, once per distinct upload.
+
+    Bounded, since every cached upload is held in server memory.
+    """
+    return clean_bibtex(content.decode()).entries
+
+
 st.title("BibTeX DBLP Resolver")
+
+if st.sidebar.button("Clear DBLP cache"):
+    clear_dblp_cache()
+    st.sidebar.success("DBLP cache cleared.")
+
 st.write("Upload your BibTeX file and resolve entries with DBLP.")
 
 uploaded_file = st.file_uploader("Choose a BibTeX file", type=["bib"])
@@ -206,67 +668,83 @@ uploaded_file = st.file_uploader("Choose a BibTeX file", type=["bib"])
 if uploaded_file:
     # Initialize session state
     if "processed_entries" not in st.session_state:
-        parser = BibTexParser(common_strings=True)
-        bib_database = clean_bibtex(uploaded_file.getvalue().decode())
+        bib_entries = parse_bib(uploaded_file.getvalue())
         
         st.session_state.processed_entries = []
         st.session_state.conflict_entries = []
+        st.session_state.conflict_by_key = {}
         st.session_state.current_entry = 0
         st.session_state.current_conflict = 0
         st.session_state.processing_done = False
         st.session_state.resolution_done = False
-        st.session_state.bib_database = bib_database
+        st.session_state.bib_entries = bib_entries
 
     # Processing phase
     if not st.session_state.processing_done:
         progress_text = st.empty()
         progress_bar = st.progress(0.0)
-        bib_database = st.session_state.bib_database
+        bib_entries = st.session_state.bib_entries
+
+        # Fetch all DBLP search results (and .bib records for auto-accepts) up front,
+        # so the loop below only does matching
+        if "dblp_cache" not in st.session_state:
+
+            def report_search_progress(done: int, total: int, rate_limit_wait: float):
+                status = f"**Searching DBLP:** {done}/{total}"
+                if rate_limit_wait > 0:
+                    status += f" (rate limited by DBLP, waiting {rate_limit_wait:.0f} seconds...)"
+                progress_text.markdown(status)
+                progress_bar.progress(done / total)
+
+            titles = [entry.get("title", "") for entry in bib_entries]
+            st.session_state.dblp_cache = prefetch_all(titles, on_progress=report_search_progress)
 
-        while st.session_state.current_entry < len(bib_database.entries):
-            entry = bib_database.entries[st.session_state.current_entry]
+        while st.session_state.current_entry < len(bib_entries):
+            entry = bib_entries[st.session_state.current_entry]
             
             # Update progress
-            progress = (st.session_state.current_entry + 1) / len(bib_database.entries)
-            progress_text.markdown(f"**Processing entries:** {st.session_state.current_entry + 1}/{len(bib_database.entries)}")
+            progress = (st.session_state.current_entry + 1) / len(bib_entries)
+            progress_text.markdown(f"**Processing entries:** {st.session_state.current_entry + 1}/{len(bib_entries)}")
             progress_bar.progress(progress)
 
-            # Search DBLP
-            with st.spinner(f"Searching DBLP for '{entry.get('title', '')}'..."):
-                dblp_results = search_dblp(entry.get("title", ""))
+            # Look up prefetched DBLP results, retrying lookups that failed during prefetch
+            title = entry.get("title", "")
+            dblp_results = st.session_state.dblp_cache.get(clean_title(title))
+            if dblp_results is None:
+                with _dblp_spinner(f"Searching DBLP for '{title}'..."):
+                    dblp_results = search_dblp(title)
 
             # Process results
             if dblp_results:
-                # Find exact matches
-                original_clean = clean_title(entry.get("title", ""))
-                exact_matches = []
-                other_matches = []
-
-                for result in dblp_results:
-                    result_clean = clean_title(result.get("title", ""))
-                    overlap = set(original_clean.split()) & set(result_clean.split())
-                    total_words = set(original_clean.split()) | set(result_clean.split())
-                    similarity = len(overlap) / len(total_words) if total_words else 0
-
-                    if similarity > 0.8:
-                        exact_matches.append(result)
-                    else:
-                        other_matches.append(result)
-
-                # Sort exact matches to prefer non-CoRR
-                exact_matches.sort(key=lambda x: "CoRR" in x.get("venue", "") or "arXiv" in x.get("venue", ""))
+                exact_match = find_exact_match(entry.get("title", ""), dblp_results)
 
-                if exact_matches:
-                    merged = merge_entries(entry, exact_matches[0])
+                if exact_match:
+                    merged = merge_entries(entry, exact_match)
                     st.session_state.processed_entries.append(merged)
                 else:
-                    st.session_state.conflict_entries.append({
-                        "original": entry,
-                        "matches": dblp_results
-                    })
+                    key = duplicate_key(entry)
+                    if key in st.session_state.conflict_by_key:
+                        # Same paper as an earlier conflict; one answer resolves both
+                        conflict_index = st.session_state.conflict_by_key[key]
+                        st.session_state.conflict_entries[conflict_index]["duplicates"].append(entry)
+                    else:
+                        if key is not None:
+                            st.session_state.conflict_by_key[key] = len(st.session_state.conflict_entries)
+                        # Render the displayed text once instead of on every review rerun
+                        matches = dblp_results[:5]
+                        st.session_state.conflict_entries.append({
+                            "original": entry,
+                            "matches": matches,
+                            "duplicates": [],
+                            "formatted_original": format_entry_for_display(entry),
+                            "formatted_matches": [
+                                format_entry_for_display(match, is_dblp=True) for match in matches
+                            ],
+                        })
             else:
                 # No matches found
-                st.session_state.processed_entries.append(add_todo_note(entry))
+                # The parsed entry is not referenced again, so annotate it in place
+                st.session_state.processed_entries.append(add_todo_note(entry, copy=False))
 
             st.session_state.current_entry += 1
 
@@ -279,40 +757,16 @@ if uploaded_file:
         progress_bar = st.progress(0.0)
         total_conflicts = len(st.session_state.get('conflict_entries', []))
 
-        if total_conflicts > 0:
-            # Ensure current_conflict is within valid range
-            st.session_state.current_conflict = max(0, min(st.session_state.current_conflict, total_conflicts - 1))
-            
+        # current_conflict counts resolved conflicts; the list itself never shrinks
+        if st.session_state.current_conflict < total_conflicts:
             conflict = st.session_state.conflict_entries[st.session_state.current_conflict]
-            original = conflict["original"]
-            matches = conflict["matches"]
 
             # Display conflict
             progress = (st.session_state.current_conflict + 1) / total_conflicts
             progress_text.markdown(f"**Resolving conflicts:** {st.session_state.current_conflict + 1}/{total_conflicts}")
             progress_bar.progress(progress)
 
-            st.subheader("Original Entry")
-            st.text(format_entry_for_display(original))
-
-            st.subheader("DBLP Matches")
-            for idx, match in enumerate(matches[:5]):
-                col1, col2 = st.columns([0.1, 0.9])
-                with col1:
-                    if st.button(f"{idx+1}", key=f"match_{idx}"):
-                        merged = merge_entries(original, match)
-                        st.session_state.processed_entries.append(merged)
-                        st.session_state.current_conflict += 1
-                        st.rerun()
-                with col2:
-                    st.text(format_entry_for_display(match, is_dblp=True))
-
-            if st.button("Skip", key="skip"):
-                # Mark this conflict as skipped/resolved by adding the original entry
-                st.session_state.processed_entries.append(conflict["original"])
-                # Remove the conflict from the list so it won’t be processed again
-                st.session_state.conflict_entries.pop(st.session_state.current_conflict)
-                st.rerun()
+            review_conflict(conflict)
 
         else:
             st.success("All conflicts resolved!")
@@ -323,13 +777,15 @@ if uploaded_file:
     # Final output
     else:
         st.success("All entries processed!")
-        db = BibDatabase()
-        db.entries = st.session_state.processed_entries
-        bibtex_str = bibtexparser.dumps(db)
+        # Serialize once; later reruns of this phase reuse the string
+        if "bibtex_str" not in st.session_state:
+            db = BibDatabase()
+            db.entries = st.session_state.processed_entries
+            st.session_state.bibtex_str = bibtexparser.dumps(db)
 
         st.download_button(
             label="Download processed BibTeX",
-            data=bibtex_str,
+            data=st.session_state.bibtex_str,
             file_name="processed.bib",
             mime="text/plain",
         )
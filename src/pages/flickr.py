@@ -4,52 +4,124 @@ import re
 import os
 import time
 import io
+import shutil
+import tempfile
 import zipfile
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urlparse
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 
 SUFFIX_ORDER = ["_k", "_h", "_b", "_z", "_m"]
+SUFFIX_RE = re.compile(r"(_[a-z])\.jpg$")
+MAX_DOWNLOAD_WORKERS = 8
+CHUNK_SIZE = 64 * 1024
+PRECOMPRESSED_EXTENSIONS = (".jpg", ".jpeg")
+# Images larger than this are buffered on disk instead of in memory until zipped
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+@st.cache_resource(show_spinner=False)
+def get_session():
+    """
+    Return a pooled session shared across reruns, so the page fetch, suffix probes
+    and image downloads reuse keep-alive connections to Flickr.
+    """
+    session = requests.Session()
+    session.mount(
+        "https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0)
+    )
+    return session
 
 
 def try_download_flickr_image(base_url, headers, timeout=10):
     """
-    Attempt to download an image from 'base_url' by trying different Flickr suffixes.
+    Find the largest available size of the image at 'base_url' by probing different
+    Flickr suffixes with HEAD requests, so no image bytes are transferred yet.
     Returns a tuple (success, message_or_final_url).
     """
-    match = re.search(r"(_[a-z])\.jpg$", base_url)
+    match = SUFFIX_RE.search(base_url)
     if not match:
-        return _attempt_download(base_url, headers, timeout=timeout)
+        return _attempt_download(base_url, headers, timeout=timeout, method="HEAD")
+
+    # The page already links the largest size, no need to probe
+    if match.group(1) == SUFFIX_ORDER[0]:
+        return True, base_url
 
     prefix = base_url[: match.start()]
 
     for suffix in SUFFIX_ORDER:
         candidate_url = prefix + suffix + ".jpg"
-        success, msg = _attempt_download(candidate_url, headers, timeout=timeout)
+        success, msg = _attempt_download(
+            candidate_url, headers, timeout=timeout, method="HEAD"
+        )
         if success:
             return True, candidate_url
     return False, msg
 
 
-def _attempt_download(url, headers, timeout=10):
+def _attempt_download(url, headers, timeout=10, method="GET"):
     """
-    Helper function that tries to perform a GET request on 'url'.
+    Helper function that tries to perform a request with 'method' on 'url'.
     Returns a tuple (success, message_or_url).
     """
     try:
-        r = requests.get(url, headers=headers, timeout=timeout)
+        r = get_session().request(
+            method, url, headers=headers, timeout=timeout, allow_redirects=True
+        )
         r.raise_for_status()
         return True, url
     except requests.exceptions.RequestException as e:
         return False, str(e)
 
 
+def download_image(link, filename, headers, timeout=10):
+    """
+    Download 'link', using the largest available Flickr size for staticflickr.com URLs.
+    Safe to run in worker threads; it does not touch the Streamlit UI.
+    The body is streamed into a spooled temporary file, so large images go to disk
+    rather than memory while they wait to be zipped.
+    Returns a tuple (filename, file_or_None, error); the caller closes the file.
+    """
+    if "staticflickr.com" in link:
+        success, final_url = try_download_flickr_image(link, headers, timeout=timeout)
+        if not success:
+            return filename, None, f"Failed to download {link}: {final_url}"
+        link = final_url
+
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        with get_session().get(link, headers=headers, timeout=timeout, stream=True) as r:
+            r.raise_for_status()
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                body.write(chunk)
+        body.seek(0)
+        return filename, body, None
+    except requests.exceptions.RequestException as e:
+        body.close()
+        return filename, None, f"Failed to download {link}: {e}"
+    except BaseException:
+        body.close()
+        raise
+
+
+def close_download(future):
+    """Done-callback that closes the spooled body of a finished download."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    _, body, _ = future.result()
+    if body is not None:
+        body.close()
+
+
 def extract_flickr_image_urls(html):
     """
     Use BeautifulSoup to find all images pointing to staticflickr.com within an HTML page.
     Returns a list of image URLs.
     """
-    soup = BeautifulSoup(html, "html.parser")
+    # Only build <img> tags; the rest of the page is tokenized but never turned into a tree
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("img"))
     image_elements = soup.find_all("img")
     image_urls = []
 
@@ -96,7 +168,7 @@ if st.button("Download Images"):
 
     success_count = 0
 
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_STORED) as zip_file:
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Accept": "image/webp,image/apng,image/*,*/*;q=0.8",
@@ -105,7 +177,7 @@ if st.button("Download Images"):
         }
 
         try:
-            response = requests.get(flickr_url, headers=headers, timeout=10)
+            response = get_session().get(flickr_url, headers=headers, timeout=10)
             response.raise_for_status()
             html = response.text
         except requests.exceptions.RequestException as e:
@@ -121,43 +193,55 @@ if st.button("Download Images"):
         status_text = st.empty()
         status_text.write(f"Found {len(flickr_links)} image(s). Starting download...")
 
+        downloads = []
         for index, link in enumerate(flickr_links):
             parsed_url = urlparse(link)
             filename = os.path.basename(parsed_url.path)
 
             # Ensure filename is unique and valid
             base_name, ext = os.path.splitext(filename)
-            filename = f"{base_name}_{index}{ext}"
-
-            if "staticflickr.com" in link:
-                success, final_url = try_download_flickr_image(link, headers)
-                if not success:
-                    status_text.warning(f"Failed to download {link}: {final_url}")
-                    time.sleep(0.5)
-                    continue
-                link = final_url
-
-            try:
-                r = requests.get(link, headers=headers, timeout=10)
-                r.raise_for_status()
-
-                # Create a ZipInfo object for more control
-                zip_info = zipfile.ZipInfo(filename)
-                zip_info.date_time = time.localtime()[:6]
-                zip_info.compress_type = zipfile.ZIP_DEFLATED
-
-                # Write the file to the zip
-                zip_file.writestr(zip_info, r.content)
-                success_count += 1
-                status_text.success(f"Added {filename} to zip file.")
+            downloads.append((link, f"{base_name}_{index}{ext}"))
 
-                # Update progress bar
-                progress_bar.progress((index + 1) / len(flickr_links))
-                time.sleep(0.5)
+        # Download concurrently; only this thread touches the zip file and the UI
+        executor = ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS)
+        futures = {
+            executor.submit(download_image, link, filename, headers): (link, filename)
+            for link, filename in downloads
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    filename, body, error = future.result()
+                except Exception as e:
+                    # e.g. an OSError while spooling to disk; skip the image like a failed request
+                    link, filename = futures[future]
+                    body, error = None, f"Failed to download {link}: {e}"
+                if error:
+                    status_text.warning(error)
+                else:
+                    # Create a ZipInfo object for more control
+                    zip_info = zipfile.ZipInfo(filename)
+                    zip_info.date_time = time.localtime()[:6]
+                    # JPEGs are already compressed; DEFLATE would only burn CPU
+                    if filename.lower().endswith(PRECOMPRESSED_EXTENSIONS):
+                        zip_info.compress_type = zipfile.ZIP_STORED
+                    else:
+                        zip_info.compress_type = zipfile.ZIP_DEFLATED
+
+                    # Stream the file into the zip
+                    with body, zip_file.open(zip_info, "w") as zip_entry:
+                        shutil.copyfileobj(body, zip_entry, CHUNK_SIZE)
+                    success_count += 1
+                    status_text.success(f"Added {filename} to zip file.")
 
-            except requests.exceptions.RequestException as e:
-                status_text.error(f"Failed to download {link}: {e}")
-                time.sleep(0.5)
+                # Update progress bar
+                progress_bar.progress(done / len(downloads))
+        finally:
+            # A rerun or stop raises out of the loop; cancel queued downloads instead of
+            # waiting on them, and close bodies that were fetched but never zipped
+            executor.shutdown(wait=False, cancel_futures=True)
+            for future in futures:
+                future.add_done_callback(close_download)
 
         progress_bar.progress(1.0)
 